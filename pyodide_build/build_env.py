@@ -6,17 +6,20 @@ import os
 import re
 import subprocess
 import sys
-from collections.abc import Iterator
+import tomllib
 from contextlib import nullcontext, redirect_stdout
 from io import StringIO
 from pathlib import Path
+from typing import Any
 
 from packaging.tags import Tag, compatible_tags, cpython_tags
 
 from pyodide_build import __version__
-from pyodide_build.common import search_pyproject_toml, to_bool, xbuildenv_dirname
-from pyodide_build.config import ConfigManager
-from pyodide_build.recipe import load_all_recipes
+from pyodide_build.common import find_pyproject_toml, to_bool, xbuildenv_dirname
+from pyodide_build.config import BUILD_VAR_TO_KEY, ConfigManager
+
+# (X.Y.Z) or (X.Y.Z)-git, as printed in the first line of `emcc -v`
+_EMCC_VERSION_RE = re.compile(r"(\d+\.\d+\.\d+)(-\w+)?")
 
 RUST_BUILD_PRELUDE = """
 rustup toolchain install ${RUST_TOOLCHAIN} && rustup default ${RUST_TOOLCHAIN}
@@ -99,28 +102,79 @@ def search_pyodide_root(curdir: str | Path, *, max_depth: int = 10) -> Path | No
     Recursively search for the root of the Pyodide repository,
     by looking for the pyproject.toml file in the parent directories
     which contains the [tool._pyodide] section.
+
+    The result is cached per directory, call _invalidate_search_cache()
+    if a pyproject.toml file is created or removed afterwards.
     """
-    pyproject_path, pyproject_file = search_pyproject_toml(curdir, max_depth)
+    # normalize the path so that e.g. "a/b" and "a/./b" share a cache entry
+    return _search_pyodide_root(os.path.abspath(curdir), max_depth)
+
+
+@functools.cache
+def _search_pyodide_root(curdir: str, max_depth: int) -> Path | None:
+    pyproject_path = find_pyproject_toml(curdir, max_depth)
+
+    if pyproject_path is None:
+        return None
 
-    if pyproject_path is None or pyproject_file is None:
+    content = pyproject_path.read_bytes()
+    # Most projects are not the Pyodide tree, don't parse their pyproject.toml
+    if b"_pyodide" not in content:
         return None
 
+    try:
+        pyproject_file = tomllib.loads(content.decode())
+    except tomllib.TOMLDecodeError as e:
+        raise ValueError(f"Could not parse {pyproject_path}.") from e
+
     if "tool" in pyproject_file and "_pyodide" in pyproject_file["tool"]:
         return pyproject_path.parent
 
     return None
 
 
+def _invalidate_search_cache() -> None:
+    _search_pyodide_root.cache_clear()
+
+
 def in_xbuildenv() -> bool:
     pyodide_root = get_pyodide_root()
     return pyodide_root.name == "pyodide-root"
 
 
-@functools.cache
+# Results of get_build_environment_vars, keyed by _env_cache_key()
+_build_environment_vars_cache: dict[tuple[Any, ...], dict[str, str]] = {}
+
+
+def _env_cache_key(pyodide_root: Path) -> tuple[Any, ...]:
+    """
+    Cache key for get_build_environment_vars.
+
+    Host environment variables have precedence over the configuration files,
+    so the values of all the variables that ConfigManager reads are part of the key.
+    The configuration file is looked up from the current working directory,
+    so it is part of the key as well.
+    This way a change in the host environment is picked up without clearing the cache.
+    """
+    return (
+        pyodide_root,
+        Path.cwd(),
+        *(os.environ.get(var) for var in BUILD_VAR_TO_KEY),
+    )
+
+
 def get_build_environment_vars(pyodide_root: Path) -> dict[str, str]:
     """
     Get common environment variables for the in-tree and out-of-tree build.
     """
+    key = _env_cache_key(pyodide_root)
+    if key not in _build_environment_vars_cache:
+        _build_environment_vars_cache[key] = _get_build_environment_vars(pyodide_root)
+
+    return _build_environment_vars_cache[key]
+
+
+def _get_build_environment_vars(pyodide_root: Path) -> dict[str, str]:
     config_manager = ConfigManager(pyodide_root)
     env = config_manager.to_env()
 
@@ -142,12 +196,11 @@ def get_build_flag(name: str) -> str:
     """
     Get a value of a build flag.
     """
-    pyodide_root = get_pyodide_root()
-    build_vars = get_build_environment_vars(pyodide_root)
-    if name not in build_vars:
-        raise ValueError(f"Unknown build flag: {name}")
-
-    return build_vars[name]
+    build_vars = get_build_environment_vars(get_pyodide_root())
+    try:
+        return build_vars[name]
+    except KeyError:
+        raise ValueError(f"Unknown build flag: {name}") from None
 
 
 def get_pyversion_major() -> str:
@@ -179,6 +232,9 @@ def get_unisolated_packages() -> list[str]:
         # in xbuild env, read from file
         unisolated_packages = unisolated_file.read_text().splitlines()
     else:
+        # pyodide_build.recipe pulls in pydantic, only import it when needed
+        from pyodide_build.recipe import load_all_recipes
+
         unisolated_packages = []
         recipe_dir = PYODIDE_ROOT / "packages"
         recipes = load_all_recipes(recipe_dir)
@@ -200,20 +256,32 @@ def wheel_platform() -> str:
     return f"pyodide_{abi_version}_wasm32"
 
 
-def pyodide_tags() -> Iterator[Tag]:
+def pyodide_tags() -> tuple[Tag, ...]:
     """
     Returns the sequence of tag triples for the Pyodide interpreter.
 
     The sequence is ordered in decreasing specificity.
     """
-    PYMAJOR = get_pyversion_major()
-    PYMINOR = get_pyversion_minor()
-    PLATFORMS = [platform(), wheel_platform()]
-    python_version = (int(PYMAJOR), int(PYMINOR))
-    yield from cpython_tags(platforms=PLATFORMS, python_version=python_version)
-    yield from compatible_tags(platforms=PLATFORMS, python_version=python_version)
-    # Following line can be removed once packaging 22.0 is released and we update to it.
-    yield Tag(interpreter=f"cp{PYMAJOR}{PYMINOR}", abi="none", platform="any")
+    # The build flags can be overridden through the environment, so they are
+    # part of the cache key rather than being read inside the cached function.
+    return _pyodide_tags(
+        get_pyversion_major(),
+        get_pyversion_minor(),
+        (platform(), wheel_platform()),
+    )
+
+
+@functools.cache
+def _pyodide_tags(
+    pymajor: str, pyminor: str, platforms: tuple[str, ...]
+) -> tuple[Tag, ...]:
+    python_version = (int(pymajor), int(pyminor))
+    return (
+        *cpython_tags(platforms=platforms, python_version=python_version),
+        *compatible_tags(platforms=platforms, python_version=python_version),
+        # Following line can be removed once packaging 22.0 is released and we update to it.
+        Tag(interpreter=f"cp{pymajor}{pyminor}", abi="none", platform="any"),
+    )
 
 
 def replace_so_abi_tags(wheel_dir: Path) -> None:
@@ -256,8 +324,7 @@ def check_emscripten_version() -> None:
     installed_version = None
     try:
         for x in reversed(version_info.partition("\n")[0].split(" ")):
-            # (X.Y.Z) or (X.Y.Z)-git
-            match = re.match(r"(\d+\.\d+\.\d+)(-\w+)?", x)
+            match = _EMCC_VERSION_RE.match(x)
             if match:
                 installed_version = match.group(1)
                 break
@@ -3,8 +3,10 @@
 #   This module should not import any other modules from pyodide-build except logger to avoid circular imports.
 
 import contextlib
+import functools
 import hashlib
 import os
+import re
 import shutil
 import subprocess
 import sys
@@ -25,6 +27,13 @@ from packaging.utils import parse_wheel_filename
 
 from pyodide_build.logger import logger
 
+# A "$(VAR)" reference in a configuration value
+_ENV_VAR_REF_RE = re.compile(r"\$\(([^)]*)\)")
+
+# parse_wheel_filename is pure; the same dist/*.whl names get re-parsed each
+# time buildall checks whether a package needs to be rebuilt.
+_parse_wheel_filename = functools.lru_cache(maxsize=4096)(parse_wheel_filename)
+
 
 def xbuildenv_dirname() -> str:
     from pyodide_build import __version__
@@ -33,7 +42,7 @@ def xbuildenv_dirname() -> str:
 
 
 def find_matching_wheels(
-    wheel_paths: Iterable[Path], supported_tags: Iterator[Tag]
+    wheel_paths: Iterable[Path], supported_tags: Iterable[Tag]
 ) -> Iterator[Path]:
     """
     Returns the sequence wheels whose tags match the Pyodide interpreter.
@@ -47,19 +56,26 @@ def find_matching_wheels(
 
     Returns
     -------
-    The subset of wheel_paths that have tags that match the Pyodide interpreter.
+    The subset of wheel_paths that have tags that match the Pyodide interpreter,
+    ordered by the position of their best matching tag in supported_tags.
     """
-    wheel_paths = list(wheel_paths)
-    wheel_tags_list: list[frozenset[Tag]] = []
+    # supported_tags is ordered in decreasing specificity, so the index of
+    # a tag is its priority (lower is better).
+    tag_priority: dict[Tag, int] = {}
+    for priority, tag in enumerate(supported_tags):
+        tag_priority.setdefault(tag, priority)
 
+    matching_wheels: list[tuple[int, Path]] = []
     for wheel in wheel_paths:
-        _, _, _, tags = parse_wheel_filename(wheel.name)
-        wheel_tags_list.append(tags)
+        _, _, _, tags = _parse_wheel_filename(wheel.name)
+        priorities = [tag_priority[tag] for tag in tags if tag in tag_priority]
+        if priorities:
+            matching_wheels.append((min(priorities), wheel))
 
-    for supported_tag in supported_tags:
-        for wheel_path, wheel_tags in zip(wheel_paths, wheel_tags_list, strict=True):
-            if supported_tag in wheel_tags:
-                yield wheel_path
+    # sort is stable, so wheels with the same priority keep their input order
+    matching_wheels.sort(key=lambda item: item[0])
+    for _, wheel in matching_wheels:
+        yield wheel
 
 
 def parse_top_level_import_name(whlfile: Path) -> list[str] | None:
@@ -127,12 +143,11 @@ def _environment_substitute_str(
     A string with the substitutions applied.
     """
     if env is None:
-        env = dict(os.environ)
+        env = os.environ
 
-    for e_name, e_value in env.items():
-        string = string.replace(f"$({e_name})", e_value)
-
-    return string
+    return _ENV_VAR_REF_RE.sub(
+        lambda match: env.get(match.group(1), match.group(0)), string
+    )
 
 
 def environment_substitute_args(
@@ -422,24 +437,36 @@ def search_pyproject_toml(
     """
     Recursively search for the pyproject.toml file in the parent directories.
     """
+    pyproject_file = find_pyproject_toml(curdir, max_depth)
+    if pyproject_file is None:
+        return None, None
 
-    # We want to include "curdir" in parent_dirs, so add a garbage suffix
-    parent_dirs = (Path(curdir) / "garbage").parents[:max_depth]
-
-    for base in parent_dirs:
-        pyproject_file = base / "pyproject.toml"
-
-        if not pyproject_file.is_file():
-            continue
+    try:
+        with pyproject_file.open("rb") as f:
+            configs = tomllib.load(f)
+            return pyproject_file, configs
+    except tomllib.TOMLDecodeError as e:
+        raise ValueError(f"Could not parse {pyproject_file}.") from e
 
-        try:
-            with pyproject_file.open("rb") as f:
-                configs = tomllib.load(f)
-                return pyproject_file, configs
-        except tomllib.TOMLDecodeError as e:
-            raise ValueError(f"Could not parse {pyproject_file}.") from e
 
-    return None, None
+def find_pyproject_toml(curdir: str | Path, max_depth: int = 10) -> Path | None:
+    """
+    Find the closest pyproject.toml file in curdir or its parent directories,
+    without parsing it.
+    """
+    # Walk up with plain strings to avoid creating a Path object per ancestor
+    base = os.path.normpath(curdir)
+    for _ in range(max_depth):
+        pyproject_file = os.path.join(base, "pyproject.toml")
+        if os.path.isfile(pyproject_file):
+            return Path(pyproject_file)
+
+        parent = os.path.dirname(base)
+        if parent == base:
+            break
+        base = parent
+
+    return None
 
 
 def to_bool(value: str) -> bool:
@@ -1,4 +1,5 @@
 import os
+import re
 import subprocess
 from collections.abc import Mapping
 from pathlib import Path
@@ -11,6 +12,12 @@ from pyodide_build.common import (
 )
 from pyodide_build.logger import logger
 
+# A "NAME=value" line in the output of `make -f Makefile.envs .output_vars`
+_MAKE_OUTPUT_VAR_RE = re.compile(r"^([^=\n]*)=(.*)$", re.MULTILINE)
+
+# Makefile.envs path => (mtime of Makefile.envs, variables)
+_make_environment_vars_cache: dict[Path, tuple[int, dict[str, str]]] = {}
+
 
 class ConfigManager:
     """
@@ -59,10 +66,27 @@ class ConfigManager:
     def _get_make_environment_vars(self) -> Mapping[str, str]:
         """
         Load environment variables from Makefile.envs
+
+        The result is cached until Makefile.envs is modified, so that `make` is
+        only invoked once per Pyodide root.
         """
-        environment = {}
+        makefile = self.pyodide_root / "Makefile.envs"
+        try:
+            mtime = makefile.stat().st_mtime_ns
+        except FileNotFoundError:
+            return self._run_make_output_vars(makefile)
+
+        cached = _make_environment_vars_cache.get(makefile)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        makefile_vars = self._run_make_output_vars(makefile)
+        _make_environment_vars_cache[makefile] = (mtime, makefile_vars)
+        return makefile_vars
+
+    def _run_make_output_vars(self, makefile: Path) -> dict[str, str]:
         result = subprocess.run(
-            ["make", "-f", str(self.pyodide_root / "Makefile.envs"), ".output_vars"],
+            ["make", "-f", str(makefile), ".output_vars"],
             capture_output=True,
             text=True,
             env={"PYODIDE_ROOT": str(self.pyodide_root)},
@@ -75,19 +99,11 @@ class ConfigManager:
             )
             exit_with_stdio(result)
 
-        for line in result.stdout.splitlines():
-            equalPos = line.find("=")
-            if equalPos != -1:
-                varname = line[0:equalPos]
-
-                if varname not in BUILD_VAR_TO_KEY:
-                    continue
-
-                value = line[equalPos + 1 :]
-                value = value.strip("'").strip()
-                environment[varname] = value
-
-        return environment
+        return {
+            varname: value.strip("'").strip()
+            for varname, value in _MAKE_OUTPUT_VAR_RE.findall(result.stdout)
+            if varname in BUILD_VAR_TO_KEY
+        }
 
     def _load_config_from_env(self, env: Mapping[str, str]) -> Mapping[str, str]:
         return {
@@ -186,7 +186,7 @@ class MetaConfig(BaseModel):
         yaml = YAML()
         yaml.representer.ignore_aliases = lambda *_: True
 
-        with open(path, "w") as f:
+        with open(path, "w", encoding="utf-8") as f:
             yaml.dump(self.model_dump(by_alias=True, exclude_unset=True), f)
 
     @pydantic.model_validator(mode="after")
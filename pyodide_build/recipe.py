@@ -1,19 +1,67 @@
-import functools
-from collections.abc import Iterable
+import os
+import stat
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
 from pyodide_build.io import MetaConfig
 from pyodide_build.logger import logger
 
+# recipe_dir => (meta.yaml path => mtime of that file, recipes)
+_recipes_cache: dict[Path, tuple[dict[Path, int], dict[str, MetaConfig]]] = {}
+
 
-@functools.lru_cache(maxsize=1)
 def load_all_recipes(recipe_dir: Path) -> dict[str, MetaConfig]:
-    """Load all package recipes from the recipe directory."""
+    """
+    Load all package recipes from the recipe directory.
+
+    The result is cached until a package is added, removed, or one of the
+    meta.yaml files is modified. Call _invalidate_recipes_cache() to drop
+    the cached recipes explicitly.
+    """
+    try:
+        recipe_files = dict(_iter_recipe_files(recipe_dir))
+    except FileNotFoundError:
+        return {}
+
+    cached = _recipes_cache.get(recipe_dir)
+    if cached is not None and cached[0] == recipe_files:
+        return cached[1]
+
+    recipes = _load_all_recipes(recipe_files)
+    _recipes_cache[recipe_dir] = (recipe_files, recipes)
+    return recipes
+
+
+def _invalidate_recipes_cache() -> None:
+    _recipes_cache.clear()
 
-    recipes_path = recipe_dir.glob("*/meta.yaml")
 
+def _iter_recipe_files(recipe_dir: Path) -> Iterator[tuple[Path, int]]:
+    """
+    Yield the meta.yaml file of each package directory in recipe_dir,
+    together with its mtime.
+
+    Equivalent to recipe_dir.glob("*/meta.yaml"), but checks for the file directly
+    instead of listing the content of every package directory.
+    """
+    with os.scandir(recipe_dir) as entries:
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+
+            meta_file = os.path.join(entry.path, "meta.yaml")
+            try:
+                st = os.stat(meta_file)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+
+            if stat.S_ISREG(st.st_mode):
+                yield Path(meta_file), st.st_mtime_ns
+
+
+def _load_all_recipes(recipe_files: Iterable[Path]) -> dict[str, MetaConfig]:
     recipes: dict[str, MetaConfig] = {}
-    for recipe in recipes_path:
+    for recipe in recipe_files:
         try:
             config = MetaConfig.from_yaml(recipe)
             recipes[config.package.name] = config
@@ -99,6 +147,8 @@ def load_recipes(
     if load_always_tag:
         always_recipes = tagged_recipes.get("always", [])
         for recipe in always_recipes:
-            recipes[recipe.package.name] = recipe.model_copy(deep=True)
+            # Already loaded, e.g. by "*"; no need to copy the recipe again
+            if recipe.package.name not in recipes:
+                recipes[recipe.package.name] = recipe.model_copy(deep=True)
 
     return recipes
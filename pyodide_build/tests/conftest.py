@@ -1,12 +1,14 @@
 import json
 import os
+import shutil
 from pathlib import Path
 
 import pytest
 
-from pyodide_build import build_env
+from pyodide_build import build_env, config, recipe
 from pyodide_build.common import xbuildenv_dirname
-from pyodide_build.xbuildenv import CrossBuildEnvManager
+from pyodide_build.xbuildenv import CrossBuildEnvManager, _url_to_version
+from pyodide_build.xbuildenv_releases import load_cross_build_env_metadata
 
 
 @pytest.fixture(scope="module")
@@ -55,50 +57,81 @@ def reset_env_vars():
         os.environ.update(old_environ)
 
 
+@pytest.fixture(autouse=True)
+def reset_xbuildenv_metadata_cache():
+    # load_cross_build_env_metadata is cached by URL, and the httpserver
+    # fixture serves every test from the same host and port.
+    load_cross_build_env_metadata.cache_clear()
+
+
 @pytest.fixture(scope="function")
 def reset_cache():
     # Will remove all caches before each test.
 
     def _reset():
         build_env.get_pyodide_root.cache_clear()
-        build_env.get_build_environment_vars.cache_clear()
+        build_env._build_environment_vars_cache.clear()
         build_env.get_unisolated_packages.cache_clear()
+        build_env._pyodide_tags.cache_clear()
+        build_env._invalidate_search_cache()
+        config._make_environment_vars_cache.clear()
+        recipe._invalidate_recipes_cache()
 
     _reset()
 
     yield _reset
 
 
+DUMMY_XBUILDENV_ARCHIVE = (
+    Path(__file__).parent / "_test_xbuildenv" / "xbuildenv-test.tar.gz"
+)
+
+
 @pytest.fixture(scope="function")
 def dummy_xbuildenv_url(httpserver):
     """
     Returns the URL of a dummy xbuildenv archive.
     This archive contains a minimal files that are required to install a xbuildenv.
     """
-    test_xbuildenv_archive_path = (
-        Path(__file__).parent / "_test_xbuildenv" / "xbuildenv-test.tar.gz"
-    )
-    test_xbuildenv_archive = test_xbuildenv_archive_path.read_bytes()
-
     httpserver.expect_request("/xbuildenv-test.tar.gz").respond_with_data(
-        test_xbuildenv_archive
+        DUMMY_XBUILDENV_ARCHIVE.read_bytes()
     )
     yield httpserver.url_for("/xbuildenv-test.tar.gz")
 
 
+@pytest.fixture(scope="session")
+def dummy_xbuildenv_extracted(tmp_path_factory):
+    """
+    The dummy xbuildenv archive, extracted once per session.
+
+    This directory is shared between tests and must not be modified, use dummy_xbuildenv instead.
+    """
+    path = tmp_path_factory.mktemp("dummy_xbuildenv") / "extracted"
+    shutil.unpack_archive(DUMMY_XBUILDENV_ARCHIVE, path, filter="data")
+
+    yield path
+
+
 @pytest.fixture(scope="function")
-def dummy_xbuildenv(dummy_xbuildenv_url, tmp_path, reset_env_vars, reset_cache):
+def dummy_xbuildenv(dummy_xbuildenv_extracted, tmp_path, reset_env_vars, reset_cache):
     """
-    Downloads the dummy xbuildenv archive and installs it in the temporary directory.
+    Installs the dummy xbuildenv archive in the temporary directory.
 
     This fixture can be used to run any functions that require a xbuildenv to be installed before running.
     """
     assert "PYODIDE_ROOT" not in os.environ
 
+    # Copy the extracted archive to where the manager would download it to,
+    # so install() skips the download and extraction and only does the setup.
+    # test_install_url_matches_dummy_xbuildenv checks that this matches a real download.
+    url = DUMMY_XBUILDENV_ARCHIVE.as_uri()
     manager = CrossBuildEnvManager(tmp_path / xbuildenv_dirname())
-    manager.install(
-        version=None, url=dummy_xbuildenv_url, skip_install_cross_build_packages=True
+    shutil.copytree(
+        dummy_xbuildenv_extracted,
+        manager.env_dir / _url_to_version(url),
+        symlinks=True,
     )
+    manager.install(version=None, url=url, skip_install_cross_build_packages=True)
 
     cur_dir = os.getcwd()
 
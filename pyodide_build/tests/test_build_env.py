@@ -3,7 +3,7 @@ import os
 import pytest
 
 from pyodide_build import build_env, common
-from pyodide_build.config import BUILD_KEY_TO_VAR
+from pyodide_build.config import BUILD_KEY_TO_VAR, ConfigManager
 from pyodide_build.xbuildenv import CrossBuildEnvManager
 
 
@@ -14,14 +14,25 @@ class TestInTree:
         assert build_env.search_pyodide_root(tmp_path) == tmp_path
         assert build_env.search_pyodide_root(tmp_path / "subdir") == tmp_path
         assert build_env.search_pyodide_root(tmp_path / "subdir" / "subdir") == tmp_path
+        # pathlib would drop the "." segment, so pass it as a string
+        assert build_env.search_pyodide_root(f"{tmp_path}/subdir/./subdir") == tmp_path
 
         pyproject_file.unlink()
+        # the previous result is cached
+        assert build_env.search_pyodide_root(tmp_path) == tmp_path
+        # including for spellings of the same directory that were never searched
+        assert build_env.search_pyodide_root(f"{tmp_path}/.") == tmp_path
+
+        build_env._invalidate_search_cache()
         assert build_env.search_pyodide_root(tmp_path) is None
 
+        # not a Pyodide pyproject.toml
+        pyproject_file.write_text('[tool.other]\nname = "_pyodide"')
+        build_env._invalidate_search_cache()
+        assert build_env.search_pyodide_root(tmp_path) is None
 
-class TestOutOfTree(TestInTree):
-    # Note: other tests are inherited from TestInTree
 
+class TestOutOfTree:
     def test_init_environment(self, dummy_xbuildenv, reset_env_vars, reset_cache):
         assert "PYODIDE_ROOT" not in os.environ
 
@@ -31,11 +42,8 @@ class TestOutOfTree(TestInTree):
         assert "PYODIDE_ROOT" in os.environ
         assert os.environ["PYODIDE_ROOT"] == str(manager.pyodide_root)
 
-    def test_init_environment_pyodide_root_already_set(
-        self, reset_env_vars, reset_cache
-    ):
-        assert "PYODIDE_ROOT" not in os.environ
-        os.environ["PYODIDE_ROOT"] = "/set_by_user"
+    def test_init_environment_pyodide_root_already_set(self, monkeypatch, reset_cache):
+        monkeypatch.setenv("PYODIDE_ROOT", "/set_by_user")
 
         build_env.init_environment()
 
@@ -48,11 +56,8 @@ class TestOutOfTree(TestInTree):
         manager = CrossBuildEnvManager(dummy_xbuildenv / common.xbuildenv_dirname())
         assert pyodide_root == manager.pyodide_root
 
-    def test_get_pyodide_root_pyodide_root_already_set(
-        self, reset_env_vars, reset_cache
-    ):
-        assert "PYODIDE_ROOT" not in os.environ
-        os.environ["PYODIDE_ROOT"] = "/set_by_user"
+    def test_get_pyodide_root_pyodide_root_already_set(self, monkeypatch, reset_cache):
+        monkeypatch.setenv("PYODIDE_ROOT", "/set_by_user")
 
         assert str(build_env.get_pyodide_root()) == "/set_by_user"
 
@@ -86,43 +91,83 @@ class TestOutOfTree(TestInTree):
         with pytest.raises(ValueError):
             build_env.get_build_flag("UNKNOWN_VAR")
 
+    @pytest.mark.parametrize(
+        "envvar,value,in_makefile",
+        [
+            ("HOME", "/home/user", False),
+            ("PATH", "/usr/bin:/bin", True),
+            ("PIP_CONSTRAINT", "/tmp/constraint.txt", True),
+        ],
+    )
     def test_get_build_environment_vars_host_env(
-        self, monkeypatch, dummy_xbuildenv, reset_env_vars, reset_cache
+        self,
+        monkeypatch,
+        dummy_xbuildenv,
+        reset_env_vars,
+        reset_cache,
+        envvar,
+        value,
+        in_makefile,
     ):
         # host environment variables should have precedence over
         # variables defined in Makefile.envs
-
-        import os
-
         manager = CrossBuildEnvManager(dummy_xbuildenv / common.xbuildenv_dirname())
         pyodide_root = manager.pyodide_root
 
         e = build_env.get_build_environment_vars(pyodide_root)
         assert e["PYODIDE"] == "1"
 
-        monkeypatch.setenv("HOME", "/home/user")
-        monkeypatch.setenv("PATH", "/usr/bin:/bin")
+        makefile_vars = ConfigManager(pyodide_root)._get_make_environment_vars()
+        assert (envvar in makefile_vars) == in_makefile
+
+        monkeypatch.setenv(envvar, value)
         # We now inject PKG_CONFIG_LIBDIR inside buildpkg.py
         # monkeypatch.setenv("PKG_CONFIG_LIBDIR", "/x/y/z:/c/d/e")
 
-        build_env.get_build_environment_vars.cache_clear()
-
         e_host = build_env.get_build_environment_vars(pyodide_root)
-        assert e_host.get("HOME") == os.environ.get("HOME")
-        assert e_host.get("PATH") == os.environ.get("PATH")
+        assert e_host.get(envvar) == value
+        assert e_host.get(envvar) != e.get(envvar)
 
-        assert e_host.get("HOME") != e.get("HOME")
-        assert e_host.get("PATH") != e.get("PATH")
+        monkeypatch.delenv(envvar)
+        monkeypatch.setenv("RANDOM_ENV", "1234")
 
-        build_env.get_build_environment_vars.cache_clear()
+        # without the host variable, the value from Makefile.envs is used, if any
+        e_reset = build_env.get_build_environment_vars(pyodide_root)
+        if in_makefile:
+            assert e_reset[envvar] == makefile_vars[envvar]
+        else:
+            assert envvar not in e_reset
+        assert "RANDOM_ENV" not in e_reset
 
-        monkeypatch.delenv("HOME")
-        monkeypatch.setenv("RANDOM_ENV", "1234")
+    def test_get_build_environment_vars_cache(
+        self, tmp_path, monkeypatch, dummy_xbuildenv, reset_env_vars, reset_cache
+    ):
+        manager = CrossBuildEnvManager(dummy_xbuildenv / common.xbuildenv_dirname())
+        pyodide_root = manager.pyodide_root
 
-        build_env.get_build_environment_vars.cache_clear()
+        key = build_env._env_cache_key(pyodide_root)
         e = build_env.get_build_environment_vars(pyodide_root)
-        assert "HOME" not in e
-        assert "RANDOM_ENV" not in e
+        assert build_env.get_build_environment_vars(pyodide_root) is e
+
+        # variables that are not part of the configuration do not invalidate the cache
+        monkeypatch.setenv("RANDOM_ENV", "1234")
+        assert build_env._env_cache_key(pyodide_root) == key
+        assert build_env.get_build_environment_vars(pyodide_root) is e
+
+        monkeypatch.setenv("PIP_CONSTRAINT", "/tmp/constraint.txt")
+        assert build_env._env_cache_key(pyodide_root) != key
+        e_new = build_env.get_build_environment_vars(pyodide_root)
+        assert e_new["PIP_CONSTRAINT"] == "/tmp/constraint.txt"
+
+        # the configuration file is looked up from the current working directory
+        project_dir = tmp_path / "project"
+        project_dir.mkdir()
+        (project_dir / "pyproject.toml").write_text(
+            '[tool.pyodide.build]\ncflags = "-O1"\n'
+        )
+        monkeypatch.chdir(project_dir)
+        e_cwd = build_env.get_build_environment_vars(pyodide_root)
+        assert e_cwd["SIDE_MODULE_CFLAGS"] == "-O1"
 
 
 def test_check_emscripten_version(dummy_xbuildenv, monkeypatch):
@@ -185,16 +230,27 @@ clang version 15.0.0 (https://github.com/llvm/llvm-project 7effcbda49ba32991b895
         build_env.check_emscripten_version()
 
 
-def test_check_emscripten_version_skip(dummy_xbuildenv, monkeypatch, reset_cache):
+def test_check_emscripten_version_skip(dummy_xbuildenv, monkeypatch):
     with pytest.raises(RuntimeError):
         monkeypatch.setenv("SKIP_EMSCRIPTEN_VERSION_CHECK", "0")
         build_env.check_emscripten_version()
 
-    reset_cache()
     monkeypatch.setenv("SKIP_EMSCRIPTEN_VERSION_CHECK", "1")
     build_env.check_emscripten_version()
 
 
+def test_pyodide_tags_env_override(dummy_xbuildenv, monkeypatch):
+    tags = build_env.pyodide_tags()
+    assert build_env.pyodide_tags() is tags
+
+    monkeypatch.setenv("PYMINOR", "99")
+    monkeypatch.setenv("PYODIDE_ABI_VERSION", "2099_0")
+    tags_override = build_env.pyodide_tags()
+    assert tags_override != tags
+    assert tags_override[0].interpreter == f"cp{build_env.get_pyversion_major()}99"
+    assert "pyodide_2099_0_wasm32" in {tag.platform for tag in tags_override}
+
+
 def test_wheel_paths(dummy_xbuildenv):
     from pathlib import Path
 
@@ -204,21 +260,15 @@ def test_wheel_paths(dummy_xbuildenv):
     PLATFORM = build_env.platform()
     current_version = f"cp{PYMAJOR}{PYMINOR}"
     future_version = f"cp{PYMAJOR}{PYMINOR + 1}"
-    strings = []
-
-    for interp in [
-        old_version,
-        current_version,
-        future_version,
-        "py3",
-        "py2",
-        "py2.py3",
-    ]:
-        for abi in [interp, "abi3", "none"]:
-            for arch in [PLATFORM, "linux_x86_64", "any"]:
-                strings.append(f"wrapt-1.13.3-{interp}-{abi}-{arch}.whl")
-
-    paths = [Path(x) for x in strings]
+    interps = [old_version, current_version, future_version, "py3", "py2", "py2.py3"]
+    archs = [PLATFORM, "linux_x86_64", "any"]
+
+    paths = [
+        Path(f"wrapt-1.13.3-{interp}-{abi}-{arch}.whl")
+        for interp in interps
+        for abi in (interp, "abi3", "none")
+        for arch in archs
+    ]
     assert [
         x.stem.split("-", 2)[-1]
         for x in common.find_matching_wheels(paths, build_env.pyodide_tags())
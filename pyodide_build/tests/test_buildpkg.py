@@ -183,13 +183,11 @@ def test_unvendor_tests(tmpdir):
 
     def rlist(input_dir):
         """Recursively list files in input_dir"""
-        paths = sorted(input_dir.rglob("*"))
-        res = []
-
-        for el in paths:
-            if el.is_file():
-                res.append(str(el.relative_to(input_dir)))
-        return res
+        return sorted(
+            str(el.relative_to(input_dir))
+            for el in input_dir.rglob("*")
+            if el.is_file()
+        )
 
     install_prefix = Path(str(tmpdir / "install"))
     test_install_prefix = Path(str(tmpdir / "install-tests"))
@@ -8,7 +8,7 @@ import typer
 from typer.testing import CliRunner
 
 import pyodide_build
-from pyodide_build import build_env, cli, common
+from pyodide_build import build_env, cli, common, mkpkg
 from pyodide_build.cli import (
     build,
     build_recipes,
@@ -20,6 +20,19 @@ from pyodide_build.cli import (
 
 runner = CliRunner()
 
+RECIPE_DIR = Path(__file__).parent / "_test_recipes"
+
+
+@pytest.fixture
+def recipe_dir(tmp_path):
+    """
+    A copy of the test recipes, so that tests building them do not write
+    build artifacts into the source tree and do not depend on each other.
+    """
+    dst = tmp_path / "recipes"
+    shutil.copytree(RECIPE_DIR, dst, ignore=shutil.ignore_patterns("build", "dist"))
+    return dst
+
 
 def test_skeleton_pypi(tmp_path):
     test_pkg = "pytest-pyodide"
@@ -55,16 +68,16 @@ def test_skeleton_pypi(tmp_path):
     assert result.exit_code == 0
     assert f"Updated {test_pkg} from {old_version} to {new_version}" in result.stdout
 
-    result = runner.invoke(
-        skeleton.app, ["pypi", test_pkg, "--recipe-dir", str(tmp_path)]
-    )
-    assert result.exit_code != 0
-    assert "already exists" in str(result.exception)
+    with pytest.raises(mkpkg.MkpkgFailedException, match="already exists"):
+        runner.invoke(
+            skeleton.app,
+            ["pypi", test_pkg, "--recipe-dir", str(tmp_path)],
+            catch_exceptions=False,
+        )
 
 
-def test_build_recipe(tmp_path, dummy_xbuildenv, mock_emscripten):
+def test_build_recipe(tmp_path, recipe_dir, dummy_xbuildenv, mock_emscripten):
     output_dir = tmp_path / "dist"
-    recipe_dir = Path(__file__).parent / "_test_recipes"
 
     pkgs = {
         "pkg_test_tag_always": {},
@@ -74,9 +87,6 @@ def test_build_recipe(tmp_path, dummy_xbuildenv, mock_emscripten):
 
     pkgs_to_build = pkgs.keys() | {p for v in pkgs.values() for p in v}
 
-    for build_dir in recipe_dir.rglob("build"):
-        shutil.rmtree(build_dir)
-
     app = typer.Typer()
     app.command()(build_recipes.build_recipes)
 
@@ -101,12 +111,7 @@ def test_build_recipe(tmp_path, dummy_xbuildenv, mock_emscripten):
     assert len(built_wheels) == len(pkgs_to_build)
 
 
-def test_build_recipe_no_deps(tmp_path, dummy_xbuildenv, mock_emscripten):
-    recipe_dir = Path(__file__).parent / "_test_recipes"
-
-    for build_dir in recipe_dir.rglob("build"):
-        shutil.rmtree(build_dir)
-
+def test_build_recipe_no_deps(tmp_path, recipe_dir, dummy_xbuildenv, mock_emscripten):
     app = typer.Typer()
     app.command()(build_recipes.build_recipes_no_deps)
 
@@ -130,12 +135,9 @@ def test_build_recipe_no_deps(tmp_path, dummy_xbuildenv, mock_emscripten):
         assert len(list(dist_dir.glob("*.whl"))) == 1
 
 
-def test_build_recipe_no_deps_force_rebuild(tmp_path, dummy_xbuildenv, mock_emscripten):
-    recipe_dir = Path(__file__).parent / "_test_recipes"
-
-    for build_dir in recipe_dir.rglob("build"):
-        shutil.rmtree(build_dir)
-
+def test_build_recipe_no_deps_force_rebuild(
+    tmp_path, recipe_dir, dummy_xbuildenv, mock_emscripten
+):
     app = typer.Typer()
     app.command()(build_recipes.build_recipes_no_deps)
 
@@ -179,12 +181,9 @@ def test_build_recipe_no_deps_force_rebuild(tmp_path, dummy_xbuildenv, mock_emsc
     assert f"Succeeded building package {pkg}" in result.stdout
 
 
-def test_build_recipe_no_deps_continue(tmp_path, dummy_xbuildenv, mock_emscripten):
-    recipe_dir = Path(__file__).parent / "_test_recipes"
-
-    for build_dir in recipe_dir.rglob("build"):
-        shutil.rmtree(build_dir)
-
+def test_build_recipe_no_deps_continue(
+    tmp_path, recipe_dir, dummy_xbuildenv, mock_emscripten
+):
     app = typer.Typer()
     app.command()(build_recipes.build_recipes_no_deps)
 
@@ -201,23 +200,21 @@ def test_build_recipe_no_deps_continue(tmp_path, dummy_xbuildenv, mock_emscripte
     assert result.exit_code == 0, result.stdout
     assert f"Succeeded building package {pkg}" in result.stdout
 
-    for wheels in (recipe_dir / pkg / "build").rglob("*.whl"):
+    # The source is extracted to <build_dir>/<name>-<version>
+    src_extract_dir = recipe_dir / pkg / "build" / f"{pkg}-1.0.0"
+    for wheels in (src_extract_dir / "dist").glob("*.whl"):
         wheels.unlink()
 
-    pyproject_toml = next((recipe_dir / pkg / "build").rglob("pyproject.toml"))
+    pyproject_toml = src_extract_dir / "pyproject.toml"
 
     # Modify some metadata and check it is applied when rebuilt with --continue flag
     version = "99.99.99"
-    with open(pyproject_toml, encoding="utf-8") as f:
-        pyproject_data = f.read()
-
-    pyproject_data = pyproject_data.replace(
-        'version = "1.0.0"', f'version = "{version}"'
+    pyproject_toml.write_bytes(
+        pyproject_toml.read_bytes().replace(
+            b'version = "1.0.0"', f'version = "{version}"'.encode()
+        )
     )
 
-    with open(pyproject_toml, "w", encoding="utf-8") as f:
-        f.write(pyproject_data)
-
     result = runner.invoke(
         app,
         [
@@ -241,29 +238,28 @@ def test_config_list(dummy_xbuildenv):
         ],
     )
 
-    envs = result.stdout.splitlines()
-    keys = [env.split("=")[0] for env in envs]
+    configs = dict(env.split("=", 1) for env in result.stdout.splitlines())
 
-    for cfg_name in config.PYODIDE_CONFIGS.keys():
-        assert cfg_name in keys
+    for cfg_name, env_var in config.PYODIDE_CONFIGS.items():
+        assert configs[cfg_name] == build_env.get_build_flag(env_var)
 
 
-@pytest.mark.parametrize("cfg_name,env_var", config.PYODIDE_CONFIGS.items())
-def test_config_get(cfg_name, env_var, dummy_xbuildenv):
-    result = runner.invoke(
-        config.app,
-        [
-            "get",
-            cfg_name,
-        ],
-    )
+def test_config_get(dummy_xbuildenv):
+    # All config variables are checked against the same xbuildenv,
+    # instead of installing one per variable.
+    for cfg_name, env_var in config.PYODIDE_CONFIGS.items():
+        result = runner.invoke(
+            config.app,
+            [
+                "get",
+                cfg_name,
+            ],
+        )
 
-    assert result.stdout.strip() == build_env.get_build_flag(env_var)
+        assert result.stdout.strip() == build_env.get_build_flag(env_var)
 
 
 def test_create_zipfile(temp_python_lib, temp_python_lib2, tmp_path):
-    from zipfile import ZipFile
-
     output = tmp_path / "python.zip"
 
     app = typer.Typer()
@@ -283,16 +279,13 @@ def test_create_zipfile(temp_python_lib, temp_python_lib2, tmp_path):
     assert "Zip file created" in result.stdout
     assert output.exists()
 
-    with ZipFile(output) as zf:
-        assert "module1.py" in zf.namelist()
-        assert "module2.py" in zf.namelist()
-        assert "module3.py" in zf.namelist()
-        assert "module4.py" in zf.namelist()
+    with zipfile.ZipFile(output) as zf:
+        names = set(zf.namelist())
 
+    assert {"module1.py", "module2.py", "module3.py", "module4.py"} <= names
 
-def test_create_zipfile_compile(temp_python_lib, temp_python_lib2, tmp_path):
-    from zipfile import ZipFile
 
+def test_create_zipfile_compile(temp_python_lib, temp_python_lib2, tmp_path):
     output = tmp_path / "python.zip"
 
     app = typer.Typer()
@@ -313,18 +306,17 @@ def test_create_zipfile_compile(temp_python_lib, temp_python_lib2, tmp_path):
     assert "Zip file created" in result.stdout
     assert output.exists()
 
-    with ZipFile(output) as zf:
-        assert "module1.pyc" in zf.namelist()
-        assert "module2.pyc" in zf.namelist()
-        assert "module3.pyc" in zf.namelist()
-        assert "module4.pyc" in zf.namelist()
+    with zipfile.ZipFile(output) as zf:
+        names = set(zf.namelist())
+
+    assert {"module1.pyc", "module2.pyc", "module3.pyc", "module4.pyc"} <= names
 
 
 @pytest.mark.parametrize("target", ["dir", "file"])
 @pytest.mark.parametrize("compression_level", [0, 6])
 def test_py_compile(tmp_path, target, compression_level):
     wheel_path = tmp_path / "python.zip"
-    with zipfile.ZipFile(wheel_path, "w", compresslevel=3) as zf:
+    with zipfile.ZipFile(wheel_path, "w", compression=zipfile.ZIP_STORED) as zf:
         zf.writestr("a1.py", "def f():\n    pass")
 
     if target == "dir":
@@ -408,10 +400,10 @@ def test_build2_replace_so_abi_tags(
     app.command(**build.main.typer_kwargs)(build.main)  # type:ignore[attr-defined]
     runner.invoke(app, [str(srcdir), "--outdir", str(outdir)])
     wheel_file = next(outdir.glob("*.whl"))
-    print(zipfile.ZipFile(wheel_file).namelist())
-    so_file = next(
-        x for x in zipfile.ZipFile(wheel_file).namelist() if x.endswith(".so")
-    )
+    with zipfile.ZipFile(wheel_file) as zf:
+        names = zf.namelist()
+    print(names)
+    so_file = next(x for x in names if x.endswith(".so"))
     assert so_file.endswith(".cpython-311-wasm32-emscripten.so")
 
 
@@ -1,6 +1,6 @@
+import io
 import json
-import os
-import shutil
+import tarfile
 from pathlib import Path
 
 import pytest
@@ -10,7 +10,6 @@ from typer.testing import CliRunner
 from pyodide_build.cli import (
     xbuildenv,
 )
-from pyodide_build.common import chdir
 from pyodide_build.xbuildenv_releases import CROSS_BUILD_ENV_METADATA_URL_ENV_VAR
 
 
@@ -34,48 +33,81 @@ def is_valid_json(json_str) -> bool:
     return True
 
 
-@pytest.fixture()
-def mock_xbuildenv_url(tmp_path_factory, httpserver):
-    """
-    Create a temporary xbuildenv archive
-    """
-    base = tmp_path_factory.mktemp("base")
-
-    path = Path(base)
-
-    xbuildenv = path / "xbuildenv"
-    xbuildenv.mkdir()
-
-    pyodide_root = xbuildenv / "pyodide-root"
-    site_packages_extra = xbuildenv / "site-packages-extras"
-    requirements_txt = xbuildenv / "requirements.txt"
-
-    pyodide_root.mkdir()
-    site_packages_extra.mkdir()
-    requirements_txt.touch()
-
-    (pyodide_root / "Makefile.envs").write_text(
-        """
+MOCK_MAKEFILE_ENVS = """
 export HOSTSITEPACKAGES=$(PYODIDE_ROOT)/packages/.artifacts/lib/python$(PYMAJOR).$(PYMINOR)/site-packages
 
 .output_vars:
 	set
 """  # noqa: W191
-    )
-    (pyodide_root / "dist").mkdir()
-    mock_pyodide_lock().to_json(pyodide_root / "dist" / "pyodide-lock.json")
 
-    with chdir(base):
-        archive_name = shutil.make_archive("xbuildenv", "tar")
 
-    content = Path(base / archive_name).read_bytes()
-    httpserver.expect_request("/xbuildenv-mock.tar").respond_with_data(content)
-    yield httpserver.url_for("/xbuildenv-mock.tar")
+@pytest.fixture(scope="session")
+def mock_xbuildenv_archive() -> bytes:
+    """
+    Create a temporary xbuildenv archive
+
+    The archive is only read by the tests, so it is built once per session.
+    """
+    pyodide_lock = json.dumps(mock_pyodide_lock().model_dump(), sort_keys=True)
+
+    # archive member => file content, or None for directories
+    members: dict[str, bytes | None] = {
+        "xbuildenv": None,
+        "xbuildenv/pyodide-root": None,
+        "xbuildenv/pyodide-root/Makefile.envs": MOCK_MAKEFILE_ENVS.encode(),
+        "xbuildenv/pyodide-root/dist": None,
+        "xbuildenv/pyodide-root/dist/pyodide-lock.json": pyodide_lock.encode(),
+        "xbuildenv/site-packages-extras": None,
+        "xbuildenv/requirements.txt": b"",
+    }
+
+    # Build the archive in memory instead of creating the files on disk first
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w") as tar:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            if data is None:
+                info.type = tarfile.DIRTYPE
+                info.mode = 0o755
+                tar.addfile(info)
+            else:
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+
+    return buf.getvalue()
+
+
+@pytest.fixture(scope="session")
+def mock_xbuildenv_url(mock_xbuildenv_archive, tmp_path_factory):
+    """
+    A file:// URL of the mock xbuildenv archive
+
+    The download goes through urlopen like any other URL, without running an HTTP server.
+    The HTTP download itself is covered by the tests in test_xbuildenv.py.
+    """
+    archive = tmp_path_factory.mktemp("mock_xbuildenv") / "xbuildenv-mock.tar"
+    archive.write_bytes(mock_xbuildenv_archive)
+    return archive.as_uri()
 
 
 runner = CliRunner()
 
 
+@pytest.fixture()
+def mock_xbuildenv_versions(tmp_path):
+    """
+    Create a xbuildenv directory with versions 0.25.0, 0.25.1 and 0.26.0 installed,
+    0.26.0 being in use
+    """
+    envpath = Path(tmp_path) / ".xbuildenv"
+
+    for version in ("0.25.0", "0.25.1", "0.26.0"):
+        (envpath / version).mkdir(parents=True)
+    (envpath / "xbuildenv").symlink_to(envpath / "0.26.0")
+
+    return envpath
+
+
 def test_xbuildenv_install(tmp_path, mock_xbuildenv_url):
     envpath = Path(tmp_path) / ".xbuildenv"
 
@@ -100,12 +132,13 @@ def test_xbuildenv_install(tmp_path, mock_xbuildenv_url):
     assert (concrete_path / ".installed").exists()
 
 
-def test_xbuildenv_install_version(tmp_path, fake_xbuildenv_releases_compatible):
+def test_xbuildenv_install_version(
+    tmp_path, monkeypatch, fake_xbuildenv_releases_compatible
+):
     envpath = Path(tmp_path) / ".xbuildenv"
 
-    os.environ.pop(CROSS_BUILD_ENV_METADATA_URL_ENV_VAR, None)
-    os.environ[CROSS_BUILD_ENV_METADATA_URL_ENV_VAR] = str(
-        fake_xbuildenv_releases_compatible
+    monkeypatch.setenv(
+        CROSS_BUILD_ENV_METADATA_URL_ENV_VAR, str(fake_xbuildenv_releases_compatible)
     )
 
     result = runner.invoke(
@@ -118,8 +151,6 @@ def test_xbuildenv_install_version(tmp_path, fake_xbuildenv_releases_compatible)
         ],
     )
 
-    os.environ.pop(CROSS_BUILD_ENV_METADATA_URL_ENV_VAR, None)
-
     assert result.exit_code == 0, result.stdout
     assert "Downloading Pyodide cross-build environment" in result.stdout, result.stdout
     assert "Installing Pyodide cross-build environment" in result.stdout, result.stdout
@@ -132,13 +163,12 @@ def test_xbuildenv_install_version(tmp_path, fake_xbuildenv_releases_compatible)
 
 
 def test_xbuildenv_install_force_install(
-    tmp_path, fake_xbuildenv_releases_incompatible
+    tmp_path, monkeypatch, fake_xbuildenv_releases_incompatible
 ):
     envpath = Path(tmp_path) / ".xbuildenv"
 
-    os.environ.pop(CROSS_BUILD_ENV_METADATA_URL_ENV_VAR, None)
-    os.environ[CROSS_BUILD_ENV_METADATA_URL_ENV_VAR] = str(
-        fake_xbuildenv_releases_incompatible
+    monkeypatch.setenv(
+        CROSS_BUILD_ENV_METADATA_URL_ENV_VAR, str(fake_xbuildenv_releases_incompatible)
     )
 
     result = runner.invoke(
@@ -175,16 +205,9 @@ def test_xbuildenv_install_force_install(
     concrete_path = (envpath / "xbuildenv").resolve()
     assert (concrete_path / ".installed").exists()
 
-    os.environ.pop(CROSS_BUILD_ENV_METADATA_URL_ENV_VAR, None)
 
-
-def test_xbuildenv_version(tmp_path):
-    envpath = Path(tmp_path) / ".xbuildenv"
-
-    (envpath / "0.25.0").mkdir(exist_ok=True, parents=True)
-    (envpath / "0.25.1").mkdir(exist_ok=True, parents=True)
-    (envpath / "0.26.0").mkdir(exist_ok=True, parents=True)
-    (envpath / "xbuildenv").symlink_to(envpath / "0.26.0")
+def test_xbuildenv_version(mock_xbuildenv_versions):
+    envpath = mock_xbuildenv_versions
 
     result = runner.invoke(
         xbuildenv.app,
@@ -199,13 +222,8 @@ def test_xbuildenv_version(tmp_path):
     assert "0.26.0" in result.stdout, result.stdout
 
 
-def test_xbuildenv_versions(tmp_path):
-    envpath = Path(tmp_path) / ".xbuildenv"
-
-    (envpath / "0.25.0").mkdir(exist_ok=True, parents=True)
-    (envpath / "0.25.1").mkdir(exist_ok=True, parents=True)
-    (envpath / "0.26.0").mkdir(exist_ok=True, parents=True)
-    (envpath / "xbuildenv").symlink_to(envpath / "0.26.0")
+def test_xbuildenv_versions(mock_xbuildenv_versions):
+    envpath = mock_xbuildenv_versions
 
     result = runner.invoke(
         xbuildenv.app,
@@ -222,13 +240,8 @@ def test_xbuildenv_versions(tmp_path):
     assert "* 0.26.0" in result.stdout, result.stdout
 
 
-def test_xbuildenv_use(tmp_path):
-    envpath = Path(tmp_path) / ".xbuildenv"
-
-    (envpath / "0.25.0").mkdir(exist_ok=True, parents=True)
-    (envpath / "0.25.1").mkdir(exist_ok=True, parents=True)
-    (envpath / "0.26.0").mkdir(exist_ok=True, parents=True)
-    (envpath / "xbuildenv").symlink_to(envpath / "0.26.0")
+def test_xbuildenv_use(mock_xbuildenv_versions):
+    envpath = mock_xbuildenv_versions
 
     result = runner.invoke(
         xbuildenv.app,
@@ -246,13 +259,8 @@ def test_xbuildenv_use(tmp_path):
     ), result.stdout
 
 
-def test_xbuildenv_uninstall(tmp_path):
-    envpath = Path(tmp_path) / ".xbuildenv"
-
-    (envpath / "0.25.0").mkdir(exist_ok=True, parents=True)
-    (envpath / "0.25.1").mkdir(exist_ok=True, parents=True)
-    (envpath / "0.26.0").mkdir(exist_ok=True, parents=True)
-    (envpath / "xbuildenv").symlink_to(envpath / "0.26.0")
+def test_xbuildenv_uninstall(mock_xbuildenv_versions):
+    envpath = mock_xbuildenv_versions
 
     result = runner.invoke(
         xbuildenv.app,
@@ -284,18 +292,17 @@ def test_xbuildenv_uninstall(tmp_path):
         "Pyodide cross-build environment 0.26.0 uninstalled" in result.stdout
     ), result.stdout
 
-    result = runner.invoke(
-        xbuildenv.app,
-        [
-            "uninstall",
-            "0.26.1",
-            "--path",
-            str(envpath),
-        ],
-    )
-
-    assert result.exit_code != 0, result.stdout
-    assert isinstance(result.exception, ValueError), result.exception
+    with pytest.raises(ValueError):
+        runner.invoke(
+            xbuildenv.app,
+            [
+                "uninstall",
+                "0.26.1",
+                "--path",
+                str(envpath),
+            ],
+            catch_exceptions=False,
+        )
 
 
 def test_xbuildenv_search(
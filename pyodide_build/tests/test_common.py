@@ -1,21 +1,26 @@
+import os
 import zipfile
+from pathlib import Path
 
 import pytest
+from packaging.tags import Tag
 
 from pyodide_build.common import (
     check_wasm_magic_number,
     environment_substitute_args,
     extract_wheel_metadata_file,
+    find_matching_wheels,
     find_missing_executables,
+    find_pyproject_toml,
     make_zip_archive,
     parse_top_level_import_name,
     repack_zip_archive,
 )
 
 
-@pytest.mark.parametrize(
-    "pkg",
-    [
+@pytest.fixture(
+    scope="module",
+    params=[
         {
             "name": "pkg_singlefile-1.0.0-py3-none-any.whl",
             "file": "singlefile.py",
@@ -29,13 +34,60 @@ from pyodide_build.common import (
             "top_level": ["pkg_flit"],
         },
     ],
+    ids=["singlefile", "flit"],
 )
-def test_parse_top_level_import_name(pkg, tmp_path):
-    with zipfile.ZipFile(tmp_path / pkg["name"], "w") as whlzip:
+def built_wheel(request, tmp_path_factory):
+    pkg = request.param
+    wheel_path = tmp_path_factory.mktemp("wheels") / pkg["name"]
+    with zipfile.ZipFile(wheel_path, "w") as whlzip:
         whlzip.writestr(pkg["file"], data=pkg["content"])
 
-    top_level = parse_top_level_import_name(tmp_path / pkg["name"])
-    assert top_level == pkg["top_level"]
+    return wheel_path, pkg["top_level"]
+
+
+def test_parse_top_level_import_name(built_wheel):
+    wheel_path, expected_top_level = built_wheel
+
+    top_level = parse_top_level_import_name(wheel_path)
+    assert top_level == expected_top_level
+
+
+def test_find_pyproject_toml(tmp_path):
+    pyproject_file = tmp_path / "pyproject.toml"
+    pyproject_file.write_text("")
+    subdir = tmp_path / "a" / "b"
+    subdir.mkdir(parents=True)
+
+    assert find_pyproject_toml(tmp_path) == pyproject_file
+    assert find_pyproject_toml(subdir) == pyproject_file
+    # pathlib would drop the "." segment, so pass it as a string; "." and ".."
+    # segments must not count towards max_depth
+    dotted = os.path.join(subdir, ".", "c")
+    assert find_pyproject_toml(dotted, max_depth=4) == pyproject_file
+    assert find_pyproject_toml(f"{subdir}/c/..", max_depth=3) == pyproject_file
+    assert find_pyproject_toml(subdir, max_depth=2) is None
+    assert find_pyproject_toml(subdir, max_depth=3) == pyproject_file
+
+
+def test_find_matching_wheels():
+    supported_tags = [
+        Tag("cp312", "cp312", "emscripten_3_1_58_wasm32"),
+        Tag("py3", "none", "emscripten_3_1_58_wasm32"),
+        Tag("py3", "none", "any"),
+    ]
+    paths = [
+        Path("a-1.0-py3-none-any.whl"),
+        Path("b-1.0-cp311-cp311-emscripten_3_1_58_wasm32.whl"),
+        # matches two supported tags, but must only be returned once
+        Path("c-1.0-py3-none-emscripten_3_1_58_wasm32.any.whl"),
+        Path("d-1.0-cp312-cp312-emscripten_3_1_58_wasm32.whl"),
+    ]
+
+    assert list(find_matching_wheels(paths, iter(supported_tags))) == [
+        paths[3],
+        paths[2],
+        paths[0],
+    ]
 
 
 def test_find_missing_executables(monkeypatch):
@@ -70,6 +122,15 @@ def test_environment_var_substitution(monkeypatch):
     )
 
 
+def test_environment_var_substitution_unknown_and_nested():
+    env = {"A": "$(B)", "B": "b"}
+    args = environment_substitute_args(
+        {"known": "$(A)-$(B)", "unknown": "$(C) $(", "other": 1}, env
+    )
+    # substituted values are not expanded again, unknown references are kept
+    assert args == {"known": "$(B)-b", "unknown": "$(C) $(", "other": 1}
+
+
 @pytest.mark.parametrize(
     "compression_level, expected_compression_type",
     [(6, zipfile.ZIP_DEFLATED), (0, zipfile.ZIP_STORED)],
@@ -80,24 +141,31 @@ def test_make_zip_archive(tmp_path, compression_level, expected_compression_type
     (input_dir / "b.txt").write_text(".")
     (input_dir / "c").mkdir()
     (input_dir / "c/d").write_bytes(b"")
+    (input_dir / "zeros.bin").write_bytes(bytes(1 << 20))
 
     output_dir = tmp_path / "output.zip"
 
     make_zip_archive(output_dir, input_dir, compression_level=compression_level)
 
     with zipfile.ZipFile(output_dir) as fh:
-        assert set(fh.namelist()) == {"b.txt", "c/", "c/d"}
+        assert set(fh.namelist()) == {"b.txt", "c/", "c/d", "zeros.bin"}
         assert fh.read("b.txt") == b"."
         assert fh.getinfo("b.txt").compress_type == expected_compression_type
 
+        # level 0 must store the data as is, even when it compresses well
+        zeros = fh.getinfo("zeros.bin")
+        assert zeros.compress_type == expected_compression_type
+        if expected_compression_type == zipfile.ZIP_STORED:
+            assert zeros.compress_size == zeros.file_size
+        else:
+            assert zeros.compress_size < zeros.file_size
+
 
 @pytest.mark.parametrize(
-    "compression_level, expected_compression_type, expected_size",
-    [(6, zipfile.ZIP_DEFLATED, 220), (0, zipfile.ZIP_STORED, 1207)],
+    "compression_level, expected_compression_type",
+    [(0, zipfile.ZIP_STORED), (None, zipfile.ZIP_DEFLATED)],
 )
-def test_repack_zip_archive(
-    tmp_path, compression_level, expected_compression_type, expected_size
-):
+def test_repack_zip_archive(tmp_path, compression_level, expected_compression_type):
     input_path = tmp_path / "archive.zip"
 
     data = "a" * 1000
@@ -108,12 +176,20 @@ def test_repack_zip_archive(
         fh.writestr("a/b.txt", data)
         fh.writestr("a/b/c.txt", "d")
 
-    repack_zip_archive(input_path, compression_level=compression_level)
+    if compression_level is None:
+        # the default compression level
+        repack_zip_archive(input_path)
+    else:
+        repack_zip_archive(input_path, compression_level=compression_level)
 
     with zipfile.ZipFile(input_path) as fh:
         assert fh.namelist() == ["a/b.txt", "a/b/c.txt"]
         assert fh.getinfo("a/b.txt").compress_type == expected_compression_type
-    assert input_path.stat().st_size == expected_size
+        assert fh.read("a/b.txt") == data.encode()
+
+    if expected_compression_type == zipfile.ZIP_STORED:
+        # the compressed size under DEFLATE depends on the zlib version
+        assert input_path.stat().st_size == 1207
 
 
 def test_extract_wheel_metadata_file(tmp_path):
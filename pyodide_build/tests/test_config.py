@@ -1,3 +1,5 @@
+import os
+
 from pyodide_build import common
 from pyodide_build.config import (
     BUILD_KEY_TO_VAR,
@@ -45,6 +47,31 @@ class TestConfigManager_OutOfTree:
         make_vars = config_manager._get_make_environment_vars()
         assert make_vars["PYODIDE_ROOT"] == str(xbuildenv_manager.pyodide_root)
 
+    def test_get_make_environment_vars_cache(
+        self, monkeypatch, dummy_xbuildenv, reset_env_vars, reset_cache
+    ):
+        xbuildenv_manager = CrossBuildEnvManager(
+            dummy_xbuildenv / common.xbuildenv_dirname()
+        )
+        config_manager = ConfigManager(pyodide_root=xbuildenv_manager.pyodide_root)
+
+        make_vars = config_manager._get_make_environment_vars()
+
+        def _run_make_output_vars(*args, **kwargs):
+            raise AssertionError("make should not be invoked")
+
+        monkeypatch.setattr(
+            ConfigManager, "_run_make_output_vars", _run_make_output_vars
+        )
+        assert config_manager._get_make_environment_vars() is make_vars
+
+        # modifying Makefile.envs invalidates the cache
+        makefile = xbuildenv_manager.pyodide_root / "Makefile.envs"
+        stat = makefile.stat()
+        os.utime(makefile, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        monkeypatch.undo()
+        assert config_manager._get_make_environment_vars() is not make_vars
+
     def test_computed_vars(self, dummy_xbuildenv, reset_env_vars, reset_cache):
         xbuildenv_manager = CrossBuildEnvManager(
             dummy_xbuildenv / common.xbuildenv_dirname()
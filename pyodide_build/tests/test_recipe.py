@@ -1,3 +1,5 @@
+import os
+import shutil
 from pathlib import Path
 
 import pytest
@@ -15,6 +17,33 @@ def test_load_all_recipes():
     assert "pkg_test_graph2" in recipes
 
 
+def test_load_all_recipes_cache(tmp_path):
+    shutil.copytree(RECIPE_DIR / "pkg_test_graph1", tmp_path / "pkg_test_graph1")
+
+    recipes = recipe.load_all_recipes(tmp_path)
+    assert set(recipes) == {"pkg_test_graph1"}
+    assert recipe.load_all_recipes(tmp_path) is recipes
+
+    # adding a package invalidates the cache
+    shutil.copytree(RECIPE_DIR / "pkg_test_graph2", tmp_path / "pkg_test_graph2")
+    recipes = recipe.load_all_recipes(tmp_path)
+    assert set(recipes) == {"pkg_test_graph1", "pkg_test_graph2"}
+
+    # editing a meta.yaml in place invalidates the cache
+    meta_file = tmp_path / "pkg_test_graph1" / "meta.yaml"
+    meta_file.write_text(
+        meta_file.read_text().replace('version: "1.0.0"', 'version: "9.9.9"')
+    )
+    # make sure the mtime changes even on filesystems with a coarse resolution
+    mtime = meta_file.stat().st_mtime_ns + 1_000_000_000
+    os.utime(meta_file, ns=(mtime, mtime))
+    recipes = recipe.load_all_recipes(tmp_path)
+    assert recipes["pkg_test_graph1"].package.version == "9.9.9"
+
+    recipe._invalidate_recipes_cache()
+    assert recipe.load_all_recipes(tmp_path) is not recipes
+
+
 def test_load_recipes_basic():
     recipes = recipe.load_recipes(RECIPE_DIR, {"pkg_test_graph1", "pkg_test_graph2"})
 
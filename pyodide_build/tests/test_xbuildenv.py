@@ -2,6 +2,7 @@ import sys
 
 import pytest
 
+from pyodide_build.common import xbuildenv_dirname
 from pyodide_build.xbuildenv import CrossBuildEnvManager, _url_to_version
 
 
@@ -192,6 +193,27 @@ class TestCrossBuildEnvManager:
             manager.symlink_dir / ".build-python-version"
         ).read_text() == f"{sys.version_info.major}.{sys.version_info.minor}"
 
+    def test_install_url_matches_dummy_xbuildenv(
+        self, tmp_path, dummy_xbuildenv_url, dummy_xbuildenv
+    ):
+        # dummy_xbuildenv skips the download by seeding the version directory,
+        # make sure it ends up with the same layout as a real download.
+        dummy_manager = CrossBuildEnvManager(dummy_xbuildenv / xbuildenv_dirname())
+
+        manager = CrossBuildEnvManager(tmp_path / "downloaded")
+        manager.install(
+            version=None,
+            url=dummy_xbuildenv_url,
+            skip_install_cross_build_packages=True,
+        )
+
+        def list_files(root):
+            return sorted(str(p.relative_to(root)) for p in root.rglob("*"))
+
+        assert list_files(manager.symlink_dir.resolve()) == list_files(
+            dummy_manager.symlink_dir.resolve()
+        )
+
     def test_install_force(
         self,
         tmp_path,
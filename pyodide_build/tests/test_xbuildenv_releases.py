@@ -281,7 +281,6 @@ def test_load_cross_build_env_metadata_from_url(httpserver):
     ).respond_with_json(FAKE_METADATA)
 
     # by passing the URL
-    load_cross_build_env_metadata.cache_clear()
     metadata = load_cross_build_env_metadata(
         httpserver.url_for("/cross-build-env-metadata1.json")
     )
@@ -293,7 +292,6 @@ def test_load_cross_build_env_metadata_from_url(httpserver):
     ).respond_with_data("Not found", status=404, content_type="text/plain")
 
     with pytest.raises(requests.exceptions.HTTPError):
-        load_cross_build_env_metadata.cache_clear()
         load_cross_build_env_metadata(
             httpserver.url_for("/cross-build-env-metadata2.json")
         )
@@ -304,8 +302,6 @@ def test_load_cross_build_env_metadata_from_file(tmp_path):
     fake_metadata_file.write_text(json.dumps(FAKE_METADATA))
 
     # by passing the file path
-
-    load_cross_build_env_metadata.cache_clear()
     metadata = load_cross_build_env_metadata(str(fake_metadata_file))
 
     assert "0.1.0" in metadata.releases